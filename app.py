@@ -734,6 +734,8 @@ def check_yale_repository():
 def find_applicable_tariffs():
     """Find applicable Chapter 98/99 tariffs based on base HS code and origin using AvaTax API"""
     try:
+        from stacking_logic import CN_HK_MO, COLUMN_2_COUNTRIES
+
         data = request.json
         hs_code = data.get('hsCode', '')
         origin = data.get('origin', '')
@@ -847,10 +849,9 @@ def find_applicable_tariffs():
         existing_categories = set(t['category'] for t in tariffs)
 
         # IEEPA Reciprocal - applies to ALL countries (effective Aug 7, 2025) except Column 2
-        column_2_countries = ['BY', 'CU', 'KP', 'RU']
-        if 'ieepa_reciprocal' not in existing_categories and origin not in column_2_countries:
+        if 'ieepa_reciprocal' not in existing_categories and origin not in COLUMN_2_COUNTRIES:
             # Determine default rate based on origin
-            if origin in ['CN', 'HK', 'MO']:
+            if origin in CN_HK_MO:
                 rate = 0.10  # 10% for China/Hong Kong/Macau
             else:
                 rate = 0.10  # Default 10%, will be adjusted for EU/JP/KR based on Column 1 rate
@@ -866,7 +867,7 @@ def find_applicable_tariffs():
             logger.info(f"Added IEEPA Reciprocal tariff (origin: {origin}, rate: {rate*100}%)")
 
         # IEEPA Fentanyl - applies to CN/HK/MO only
-        if 'ieepa_fentanyl' not in existing_categories and origin in ['CN', 'HK', 'MO']:
+        if 'ieepa_fentanyl' not in existing_categories and origin in CN_HK_MO:
             tariffs.append({
                 'code': '9903.01.36',
                 'name': 'IEEPA Fentanyl Tariff',
@@ -926,7 +927,7 @@ def generate_stacking_questions():
         formatted_questions = []
         for q in questions:
             # Derive category from question ID for display purposes
-            question_id = q['id']
+            question_id = q.id
             if 'steel' in question_id:
                 category = 'Section 232 Steel'
             elif 'aluminum' in question_id:
@@ -949,32 +950,35 @@ def generate_stacking_questions():
                 category = 'Product Details'
 
             formatted_q = {
-                'question': q['text'],
-                'type': q['type'],
-                'help': q.get('help', ''),
-                'required': q.get('required', True),
+                'question': q.text,
+                'type': q.type,
+                'help': q.help,
+                'required': q.required,
                 'category': category
             }
 
             # Add type-specific fields
-            if q['type'] == 'boolean':
-                formatted_q['options'] = q.get('options', ['Yes', 'No'])
-            elif q['type'] == 'slider':
+            if q.type == 'boolean':
+                formatted_q['options'] = list(q.options or ('Yes', 'No'))
+            elif q.type == 'slider':
                 formatted_q['type'] = 'number'  # Frontend compatibility
-                formatted_q['min'] = q.get('min', 0)
-                formatted_q['max'] = q.get('max', 100)
-                formatted_q['unit'] = q.get('unit', '%')
-            elif q['type'] == 'country_select':
+                formatted_q['min'] = q.min if q.min is not None else 0
+                formatted_q['max'] = q.max if q.max is not None else 100
+                formatted_q['unit'] = q.unit or '%'
+            elif q.type == 'country_select':
                 formatted_q['type'] = 'text'
                 formatted_q['placeholder'] = 'US'
 
             # Store original question ID for answer mapping
-            formatted_q['questionId'] = q['id']
-            formatted_q['questionIndex'] = q['index']
+            formatted_q['questionId'] = q.id
+            formatted_q['questionIndex'] = q.index
 
             # Handle conditional questions
-            if 'conditional' in q:
-                formatted_q['conditional'] = q['conditional']
+            if q.conditional is not None:
+                formatted_q['conditional'] = {
+                    'depends_on': q.conditional.depends_on,
+                    'value': q.conditional.value
+                }
 
             formatted_questions.append(formatted_q)
 
@@ -993,7 +997,7 @@ def generate_stacking_questions():
 def analyze_stacking_endpoint():
     """Analyze stacking order based on answers using deterministic logic (NO GPT-4)"""
     try:
-        from stacking_logic import analyze_stacking
+        from stacking_logic import analyze_stacking, TRUTHY_ANSWERS
 
         data = request.json
         product_info = data.get('productInfo', {})
@@ -1034,7 +1038,7 @@ def analyze_stacking_endpoint():
                         parsed_answers[question_id] = 0.0
                 elif question_type == 'boolean':
                     answer_str = str(answer_raw).lower().strip()
-                    parsed_answers[question_id] = answer_str in ['yes', 'true', '1']
+                    parsed_answers[question_id] = answer_str in TRUTHY_ANSWERS
                 elif question_type == 'text':
                     parsed_answers[question_id] = str(answer_raw).strip().upper()
                 else:
@@ -3,6 +3,8 @@ Exemption Database - Centralized source of truth for Section 99 tariff exclusion
 This database is used by both the exclusion tester and the stacking builder
 """
 
+from types import MappingProxyType
+
 # Section 232 Steel Exemptions
 SECTION_232_STEEL_EXEMPTIONS = [
     {
@@ -207,6 +209,9 @@ IEEPA_EXEMPTIONS = [
     }
 ]
 
+# Answers accepted as "exactly US" for melted/poured and smelted/cast conditions
+US_ORIGIN_ANSWERS = frozenset({'US', 'USA', 'UNITED STATES', 'UNITED STATES OF AMERICA'})
+
 # CBP Stacking Order Rules
 CBP_STACKING_RULES = {
     'order': [
@@ -252,23 +257,88 @@ CBP_STACKING_RULES = {
 }
 
 
-def get_exemptions_for_category(category):
-    """Get all exemptions for a specific tariff category"""
+def _first_pct(answer):
+    """Return the percentage carried by an answer (a number or a '%' string), or None if it has none"""
+    if isinstance(answer, (int, float)):
+        return answer
+    answer_str = str(answer)
+    if '%' in answer_str:
+        try:
+            return float(answer_str.replace('%', '').strip())
+        except ValueError:
+            pass
+    return None
+
+
+def _max_answer_pct(answers):
+    """Return the largest percentage found across all answers, or None"""
+    # NaN never exceeds a threshold, so leave it out rather than let it poison max()
+    return max((p for p in map(_first_pct, answers.values()) if p is not None and p == p), default=None)
+
+
+# Lazily built registry of the exemption tables and their category index
+_EXEMPTIONS_REGISTRY = None
+
+
+def _match_exemptions(category, tables):
+    """Resolve a tariff category to its exemption table by name matching"""
     category_lower = category.lower()
 
     if 'section_232_steel' in category_lower or 'steel' in category_lower:
-        return SECTION_232_STEEL_EXEMPTIONS
+        return tables['section_232_steel']
     elif 'section_232_aluminum' in category_lower or 'aluminum' in category_lower:
-        return SECTION_232_ALUMINUM_EXEMPTIONS
+        return tables['section_232_aluminum']
     elif 'section_301' in category_lower:
-        return SECTION_301_EXEMPTIONS
+        return tables['section_301']
     elif 'ieepa' in category_lower:
-        return IEEPA_EXEMPTIONS
+        return tables['ieepa']
     else:
         return []
 
 
-def check_exemption_applies(exemption, product_info, answers):
+def _build_registry():
+    """Build the category index over the exemption tables"""
+    # Keep references to the module-level lists so later edits to them are still seen
+    tables = {
+        'section_232_steel': SECTION_232_STEEL_EXEMPTIONS,
+        'section_232_aluminum': SECTION_232_ALUMINUM_EXEMPTIONS,
+        'section_301': SECTION_301_EXEMPTIONS,
+        'ieepa': IEEPA_EXEMPTIONS
+    }
+
+    categories = set(CBP_STACKING_RULES['order']) | {
+        'section_232_copper', 'section_232_lumber', 'section_232_automotive', 'section_232_buses'
+    }
+    by_category = {category: _match_exemptions(category, tables) for category in categories}
+
+    return MappingProxyType({
+        'tables': MappingProxyType(tables),
+        'by_category': MappingProxyType(by_category)
+    })
+
+
+def _get_registry():
+    """Return the exemption registry, building it on first access"""
+    global _EXEMPTIONS_REGISTRY
+    if _EXEMPTIONS_REGISTRY is None:
+        _EXEMPTIONS_REGISTRY = _build_registry()
+    return _EXEMPTIONS_REGISTRY
+
+
+def get_exemptions_for_category(category):
+    """Get all exemptions for a specific tariff category"""
+    registry = _get_registry()
+    exemptions = registry['by_category'].get(category)
+    if exemptions is None:
+        exemptions = _match_exemptions(category, registry['tables'])
+    return exemptions
+
+
+# Default for check_exemption_applies(max_pct=...): None is a real "no percentage answers" value
+_UNSET = object()
+
+
+def check_exemption_applies(exemption, product_info, answers, max_pct=_UNSET):
     """
     Check if an exemption applies based on product info and user answers
 
@@ -276,6 +346,8 @@ def check_exemption_applies(exemption, product_info, answers):
         exemption: Exemption dict from database
         product_info: Dict with hsCode, origin, value
         answers: Dict of user answers to questions
+        max_pct: Largest percentage among answers (see _max_answer_pct);
+                 computed from answers when not supplied
 
     Returns:
         bool: True if exemption applies
@@ -317,7 +389,7 @@ def check_exemption_applies(exemption, product_info, answers):
         for answer in answers.values():
             answer_str = str(answer).strip().upper()
             # Check if answer is exactly "US" or "USA" or "UNITED STATES"
-            if answer_str in ['US', 'USA', 'UNITED STATES', 'UNITED STATES OF AMERICA']:
+            if answer_str in US_ORIGIN_ANSWERS:
                 us_origin = True
                 break
         if not us_origin:
@@ -327,18 +399,9 @@ def check_exemption_applies(exemption, product_info, answers):
     if 'us_content_percentage' in conditions:
         required_percent = float(conditions['us_content_percentage'].replace('>', '').replace('<', ''))
         # Look for percentage in answers
-        for answer in answers.values():
-            if isinstance(answer, (int, float)):
-                if answer > required_percent:
-                    return True  # Meets US content requirement
-            elif '%' in str(answer):
-                try:
-                    percent = float(str(answer).replace('%', '').strip())
-                    if percent > required_percent:
-                        return True  # Meets US content requirement
-                except:
-                    pass
-        return False  # Doesn't meet US content requirement
+        if max_pct is _UNSET:
+            max_pct = _max_answer_pct(answers)
+        return max_pct is not None and max_pct > required_percent
 
     # If all conditions passed (or no conditions specified), exemption applies
     return True
@@ -363,8 +426,18 @@ def analyze_stacking_with_exemptions(product_info, found_tariffs, questions, ans
     # Check Section 232 applies (for IEEPA exemption rule)
     section_232_applies = any('section_232' in t['category'].lower() for t in found_tariffs)
 
+    # Parse percentage answers once for all exemption checks
+    max_pct = _max_answer_pct(answers)
+
+    # Group tariffs into CBP stacking order buckets (unknown categories go last)
+    buckets = {category: [] for category in CBP_STACKING_RULES['order']}
+    other = []
+    for t in found_tariffs:
+        buckets.get(t['category'], other).append(t)
+    ordered = [t for category in CBP_STACKING_RULES['order'] for t in buckets[category]] + other
+
     # Process each tariff in CBP stacking order
-    for tariff in sorted(found_tariffs, key=lambda t: CBP_STACKING_RULES['order'].index(t['category']) if t['category'] in CBP_STACKING_RULES['order'] else 999):
+    for tariff in ordered:
 
         # Get applicable exemptions for this tariff category
         exemptions = get_exemptions_for_category(tariff['category'])
@@ -396,7 +469,7 @@ def analyze_stacking_with_exemptions(product_info, found_tariffs, questions, ans
             else:
                 # Check exemptions normally for products with metal content
                 for exemption in exemptions:
-                    if check_exemption_applies(exemption, product_info, answers):
+                    if check_exemption_applies(exemption, product_info, answers, max_pct):
                         excluded = True
                         exemption_code = exemption['code']
                         reasoning = f"EXEMPT: {exemption['name']} - {exemption['description'][:100]}"
@@ -436,7 +509,7 @@ def analyze_stacking_with_exemptions(product_info, found_tariffs, questions, ans
 
             # Check database exemptions
             for exemption in exemptions:
-                if check_exemption_applies(exemption, product_info, answers):
+                if check_exemption_applies(exemption, product_info, answers, max_pct):
                     excluded = True
                     exemption_code = exemption['code']
                     reasoning = f"EXEMPT: {exemption['name']} - {exemption['description'][:100]}"
@@ -445,7 +518,7 @@ def analyze_stacking_with_exemptions(product_info, found_tariffs, questions, ans
         # Check database exemptions for other tariffs
         elif not excluded:
             for exemption in exemptions:
-                if check_exemption_applies(exemption, product_info, answers):
+                if check_exemption_applies(exemption, product_info, answers, max_pct):
                     excluded = True
                     exemption_code = exemption['code']
                     reasoning = f"EXEMPT: {exemption['name']} - {exemption['description'][:100]}"
@@ -7,7 +7,10 @@ This module implements CBP-compliant tariff stacking analysis without GPT-4.
 All logic is deterministic and based on formal decision trees.
 """
 
+import functools
 import logging
+from dataclasses import dataclass, replace
+from types import MappingProxyType
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +41,213 @@ STACKING_ORDER = {
     'ieepa_reciprocal': 9          # NINTH: IEEPA Reciprocal (applies to NON-232 portion only, exemption 9903.01.33)
 }
 
+# Categories in evaluation order, for walking the stacking order by position
+STACKING_ORDER_TUPLE = tuple(sorted(STACKING_ORDER, key=STACKING_ORDER.get))
+
+# Country groupings used by the decision trees
+EU_COUNTRIES = frozenset({
+    'AT', 'BE', 'BG', 'HR', 'CY', 'CZ', 'DK', 'EE', 'FI', 'FR',
+    'DE', 'GR', 'HU', 'IE', 'IT', 'LV', 'LT', 'LU', 'MT', 'NL',
+    'PL', 'PT', 'RO', 'SK', 'SI', 'ES', 'SE'
+})
+SPECIAL_CALCULATION_COUNTRIES = EU_COUNTRIES | frozenset({'JP', 'KR'})  # 15% threshold rule
+COLUMN_2_COUNTRIES = frozenset({'BY', 'CU', 'KP', 'RU'})  # Belarus, Cuba, North Korea, Russia
+CN_HK_MO = frozenset({'CN', 'HK', 'MO'})
+CA_MX = frozenset({'CA', 'MX'})
+
+# Boolean answers parsed as "yes"
+TRUTHY_ANSWERS = frozenset({'yes', 'true', '1'})
+
+# Integer country classes so each decision tree classifies the origin once
+COUNTRY_OTHER = 0
+COUNTRY_CN_HK_MO = 1
+COUNTRY_CA_MX = 2
+COUNTRY_COLUMN_2 = 3
+COUNTRY_SPECIAL_CALCULATION = 4
+COUNTRY_CLASS = MappingProxyType({
+    **dict.fromkeys(CN_HK_MO, COUNTRY_CN_HK_MO),
+    **dict.fromkeys(CA_MX, COUNTRY_CA_MX),
+    **dict.fromkeys(COLUMN_2_COUNTRIES, COUNTRY_COLUMN_2),
+    **dict.fromkeys(SPECIAL_CALCULATION_COUNTRIES, COUNTRY_SPECIAL_CALCULATION)
+})
+
+# Tariff categories that have interactive questions in get_required_questions
+QUESTION_CATEGORIES = frozenset({'section_232_steel', 'section_232_aluminum', 'section_301', 'ieepa_reciprocal'})
+
+# USMCA exemption codes by origin (Section 232)
+USMCA_EXEMPTION_CODES = {'CA': '9903.01.26', 'MX': '9903.01.27'}
+
+# Auto rebate parameters from Yale (Section 232 Automotive)
+AUTO_REBATE_RATE = 0.0375      # 3.75%
+US_ASSEMBLY_SHARE = 0.33       # 33%
+US_AUTO_CONTENT_SHARE = 0.40   # 40%
+AUTO_REBATE = AUTO_REBATE_RATE * US_ASSEMBLY_SHARE  # 0.012375 (1.2375 percentage points)
+
+# USMCA shares for automotive (from Yale usmca_shares.csv)
+USMCA_SHARES = {
+    'CA': 0.9136,  # 91.36%
+    'MX': 0.7145   # 71.45%
+}
+
 
-def get_required_questions(detected_tariffs, origin_country):
+@dataclass(slots=True, frozen=True)
+class QuestionCondition:
+    """Show a question only when the answer to depends_on equals value"""
+    depends_on: str
+    value: str
+
+
+@dataclass(slots=True, frozen=True)
+class Question:
+    """Interactive question asked before stacking analysis (see get_required_questions)"""
+    id: str
+    index: int
+    text: str
+    type: str
+    required: bool
+    help: str
+    options: tuple | None = None
+    min: int | None = None
+    max: int | None = None
+    unit: str | None = None
+    conditional: QuestionCondition | None = None
+
+
+# Fixed question definitions shared across tariff categories
+_USMCA_QUESTION_TEMPLATE = Question(
+    id='usmca_qualified',
+    index=0,
+    text='Does this product qualify for USMCA (United States-Mexico-Canada Agreement)?',
+    type='boolean',
+    options=('Yes', 'No'),
+    required=True,
+    help='USMCA-qualified products from Canada/Mexico are exempt from Section 232 tariffs'
+)
+
+_HUMANITARIAN_QUESTION_TEMPLATE = Question(
+    id='is_humanitarian_donation',
+    index=0,
+    text='Is this a humanitarian donation (food, clothing, medicine)?',
+    type='boolean',
+    options=('Yes', 'No'),
+    required=True,
+    help='Humanitarian donations are exempt from IEEPA Reciprocal tariff (exemption code: 9903.01.30)'
+)
+
+_US_CONTENT_QUESTION_TEMPLATE = Question(
+    id='us_content_percentage',
+    index=0,
+    text='What percentage of the product value is U.S. content?',
+    type='slider',
+    min=0,
+    max=100,
+    unit='%',
+    required=True,
+    help='Products with >20% U.S. content are exempt from IEEPA Reciprocal tariff (exemption code: 9903.01.34)'
+)
+
+_INFORMATIONAL_MATERIALS_QUESTION_TEMPLATE = Question(
+    id='is_informational_materials',
+    index=0,
+    text='Is this product informational materials (books, films, CDs, artwork)?',
+    type='boolean',
+    options=('Yes', 'No'),
+    required=True,
+    help='Informational materials are exempt from IEEPA Reciprocal tariff (exemption code: 9903.01.21)'
+)
+
+_STEEL_PERCENTAGE_QUESTION_TEMPLATE = Question(
+    id='steel_percentage',
+    index=0,
+    text='What percentage of the product (by value) is steel?',
+    type='slider',
+    min=0,
+    max=100,
+    unit='%',
+    required=True,
+    help='Section 232 Steel tariff applies only to the steel portion of the product'
+)
+
+_STEEL_ORIGIN_QUESTION_TEMPLATE = Question(
+    id='steel_origin_country',
+    index=0,
+    text='What is the country of origin for the steel content?',
+    type='country_select',
+    required=True,
+    help='If steel was melted and poured in the United States, it may be exempt'
+)
+
+_STEEL_MELTED_POURED_QUESTION_TEMPLATE = Question(
+    id='steel_melted_poured_us',
+    index=0,
+    text='Was the steel melted AND poured in the United States?',
+    type='boolean',
+    options=('Yes', 'No'),
+    required=True,
+    conditional=QuestionCondition(
+        depends_on='steel_origin_country',
+        value='US'
+    ),
+    help='Exemption code 9903.81.92 applies if steel was both melted and poured in the US'
+)
+
+_ALUMINUM_PERCENTAGE_QUESTION_TEMPLATE = Question(
+    id='aluminum_percentage',
+    index=0,
+    text='What percentage of the product (by value) is aluminum?',
+    type='slider',
+    min=0,
+    max=100,
+    unit='%',
+    required=True,
+    help='Section 232 Aluminum tariff applies only to the aluminum portion of the product'
+)
+
+_ALUMINUM_ORIGIN_QUESTION_TEMPLATE = Question(
+    id='aluminum_origin_country',
+    index=0,
+    text='What is the country of origin for the aluminum content?',
+    type='country_select',
+    required=True,
+    help='If aluminum was smelted and cast in the United States, it may be exempt'
+)
+
+_ALUMINUM_SMELTED_CAST_QUESTION_TEMPLATE = Question(
+    id='aluminum_smelted_cast_us',
+    index=0,
+    text='Was the aluminum smelted AND cast in the United States?',
+    type='boolean',
+    options=('Yes', 'No'),
+    required=True,
+    conditional=QuestionCondition(
+        depends_on='aluminum_origin_country',
+        value='US'
+    ),
+    help='Aluminum smelted and cast in the US is exempt from Section 232 tariffs'
+)
+
+_USTR_EXCLUSION_QUESTION_TEMPLATE = Question(
+    id='ustr_product_exclusion',
+    index=0,
+    text='Does this product match one of the 164 USTR product-specific exclusions?',
+    type='boolean',
+    options=('Yes', 'No'),
+    required=True,
+    help='Check USTR Federal Register notices for detailed exclusion descriptions. Exemption code: 9903.88.69'
+)
+
+_USTR_MANUFACTURING_QUESTION_TEMPLATE = Question(
+    id='ustr_manufacturing_equipment',
+    index=0,
+    text='Is this product classified as manufacturing equipment under the 14 USTR exclusions?',
+    type='boolean',
+    options=('Yes', 'No'),
+    required=True,
+    help='Manufacturing equipment may qualify for exemption. Exemption code: 9903.88.70'
+)
+
+
+def get_required_questions(detected_tariffs, origin_country, categories=None):
     """
     Generate static list of questions based on detected tariffs.
     NO GPT-4 - this is deterministic based on tariff categories.
@@ -47,212 +255,101 @@ def get_required_questions(detected_tariffs, origin_country):
     Args:
         detected_tariffs: List of tariff dicts with 'category' field
         origin_country: ISO 2-letter country code
+        categories: Optional pre-built set of categories from detected_tariffs
 
     Returns:
-        List of question dicts with id, text, type, required fields
+        List of Question instances with id, text, type, required fields
     """
-    questions = []
-    question_index = 0
-
     # Track which categories we've detected
-    categories = {t['category'] for t in detected_tariffs}
+    if categories is None:
+        categories = {t['category'] for t in detected_tariffs}
+
+    # Only categories with questions affect the output, so key the cache on those
+    question_categories = QUESTION_CATEGORIES.intersection(categories)
+
+    # No detected tariff has interactive questions (e.g. Fentanyl only)
+    if not question_categories:
+        return []
+
+    # The cache needs a hashable key; a malformed origin (list, dict, None) matches no country anyway
+    if not isinstance(origin_country, str):
+        origin_country = str(origin_country)
+
+    # Questions are frozen, so the cached instances can be shared with callers
+    return list(_get_required_questions_cached(question_categories, origin_country))
+
+
+@functools.lru_cache(maxsize=512)
+def _get_required_questions_cached(categories, origin_country):
+    """
+    Build the question list for a (categories, origin_country) pair.
+
+    Args:
+        categories: Frozenset of detected categories that have questions
+        origin_country: ISO 2-letter country code
+
+    Returns:
+        Tuple of Question instances
+    """
+    questions = []
+    seen_ids = set()
 
     # Section 232 Steel Questions
     if 'section_232_steel' in categories:
-        if origin_country in ['CA', 'MX']:
-            questions.append({
-                'id': 'usmca_qualified',
-                'index': question_index,
-                'text': 'Does this product qualify for USMCA (United States-Mexico-Canada Agreement)?',
-                'type': 'boolean',
-                'options': ['Yes', 'No'],
-                'required': True,
-                'help': 'USMCA-qualified products from Canada/Mexico are exempt from Section 232 tariffs'
-            })
-            question_index += 1
+        if origin_country in CA_MX:
+            questions.append(replace(_USMCA_QUESTION_TEMPLATE, index=len(questions)))
+            seen_ids.add('usmca_qualified')
         else:
-            questions.append({
-                'id': 'steel_percentage',
-                'index': question_index,
-                'text': 'What percentage of the product (by value) is steel?',
-                'type': 'slider',
-                'min': 0,
-                'max': 100,
-                'unit': '%',
-                'required': True,
-                'help': 'Section 232 Steel tariff applies only to the steel portion of the product'
-            })
-            question_index += 1
-
-            questions.append({
-                'id': 'steel_origin_country',
-                'index': question_index,
-                'text': 'What is the country of origin for the steel content?',
-                'type': 'country_select',
-                'required': True,
-                'help': 'If steel was melted and poured in the United States, it may be exempt'
-            })
-            question_index += 1
+            questions.append(replace(_STEEL_PERCENTAGE_QUESTION_TEMPLATE, index=len(questions)))
+            questions.append(replace(_STEEL_ORIGIN_QUESTION_TEMPLATE, index=len(questions)))
 
             # Conditional question - will only show if user selects US
-            questions.append({
-                'id': 'steel_melted_poured_us',
-                'index': question_index,
-                'text': 'Was the steel melted AND poured in the United States?',
-                'type': 'boolean',
-                'options': ['Yes', 'No'],
-                'required': True,
-                'conditional': {
-                    'depends_on': 'steel_origin_country',
-                    'value': 'US'
-                },
-                'help': 'Exemption code 9903.81.92 applies if steel was both melted and poured in the US'
-            })
-            question_index += 1
+            questions.append(replace(_STEEL_MELTED_POURED_QUESTION_TEMPLATE, index=len(questions)))
 
     # Section 232 Aluminum Questions
     if 'section_232_aluminum' in categories:
-        if origin_country in ['CA', 'MX']:
+        if origin_country in CA_MX:
             # Only ask if we haven't already asked for steel
-            if 'usmca_qualified' not in [q['id'] for q in questions]:
-                questions.append({
-                    'id': 'usmca_qualified',
-                    'index': question_index,
-                    'text': 'Does this product qualify for USMCA (United States-Mexico-Canada Agreement)?',
-                    'type': 'boolean',
-                    'options': ['Yes', 'No'],
-                    'required': True,
-                    'help': 'USMCA-qualified products from Canada/Mexico are exempt from Section 232 tariffs'
-                })
-                question_index += 1
+            if 'usmca_qualified' not in seen_ids:
+                questions.append(replace(_USMCA_QUESTION_TEMPLATE, index=len(questions)))
+                seen_ids.add('usmca_qualified')
         else:
-            questions.append({
-                'id': 'aluminum_percentage',
-                'index': question_index,
-                'text': 'What percentage of the product (by value) is aluminum?',
-                'type': 'slider',
-                'min': 0,
-                'max': 100,
-                'unit': '%',
-                'required': True,
-                'help': 'Section 232 Aluminum tariff applies only to the aluminum portion of the product'
-            })
-            question_index += 1
-
-            questions.append({
-                'id': 'aluminum_origin_country',
-                'index': question_index,
-                'text': 'What is the country of origin for the aluminum content?',
-                'type': 'country_select',
-                'required': True,
-                'help': 'If aluminum was smelted and cast in the United States, it may be exempt'
-            })
-            question_index += 1
-
-            questions.append({
-                'id': 'aluminum_smelted_cast_us',
-                'index': question_index,
-                'text': 'Was the aluminum smelted AND cast in the United States?',
-                'type': 'boolean',
-                'options': ['Yes', 'No'],
-                'required': True,
-                'conditional': {
-                    'depends_on': 'aluminum_origin_country',
-                    'value': 'US'
-                },
-                'help': 'Aluminum smelted and cast in the US is exempt from Section 232 tariffs'
-            })
-            question_index += 1
+            questions.append(replace(_ALUMINUM_PERCENTAGE_QUESTION_TEMPLATE, index=len(questions)))
+            questions.append(replace(_ALUMINUM_ORIGIN_QUESTION_TEMPLATE, index=len(questions)))
+            questions.append(replace(_ALUMINUM_SMELTED_CAST_QUESTION_TEMPLATE, index=len(questions)))
 
     # Section 301 Questions (only for China/Hong Kong/Macau)
-    if 'section_301' in categories and origin_country in ['CN', 'HK', 'MO']:
-        questions.append({
-            'id': 'ustr_product_exclusion',
-            'index': question_index,
-            'text': 'Does this product match one of the 164 USTR product-specific exclusions?',
-            'type': 'boolean',
-            'options': ['Yes', 'No'],
-            'required': True,
-            'help': 'Check USTR Federal Register notices for detailed exclusion descriptions. Exemption code: 9903.88.69'
-        })
-        question_index += 1
-
-        questions.append({
-            'id': 'ustr_manufacturing_equipment',
-            'index': question_index,
-            'text': 'Is this product classified as manufacturing equipment under the 14 USTR exclusions?',
-            'type': 'boolean',
-            'options': ['Yes', 'No'],
-            'required': True,
-            'help': 'Manufacturing equipment may qualify for exemption. Exemption code: 9903.88.70'
-        })
-        question_index += 1
+    if 'section_301' in categories and origin_country in CN_HK_MO:
+        questions.append(replace(_USTR_EXCLUSION_QUESTION_TEMPLATE, index=len(questions)))
+        questions.append(replace(_USTR_MANUFACTURING_QUESTION_TEMPLATE, index=len(questions)))
 
     # IEEPA Reciprocal Questions
     # Per CSMS #65829726: Applies to all countries (effective Aug 7, 2025)
     # China/HK/MO continue at 10% under 9903.01.25
     if 'ieepa_reciprocal' in categories:
         # Skip Column 2 countries - they're automatically exempt
-        column_2_countries = ['BY', 'CU', 'KP', 'RU']
-        if origin_country not in column_2_countries:
+        if origin_country not in COLUMN_2_COUNTRIES:
             # Special question for EU, Japan, South Korea - need Column 1 (MFN) rate
-            eu_countries = ['AT', 'BE', 'BG', 'HR', 'CY', 'CZ', 'DK', 'EE', 'FI', 'FR',
-                            'DE', 'GR', 'HU', 'IE', 'IT', 'LV', 'LT', 'LU', 'MT', 'NL',
-                            'PL', 'PT', 'RO', 'SK', 'SI', 'ES', 'SE']
-            special_calculation_countries = eu_countries + ['JP', 'KR']
-
-            if origin_country in special_calculation_countries:
-                questions.append({
-                    'id': 'column_1_duty_rate',
-                    'index': question_index,
-                    'text': f'What is the Column 1 (MFN) duty rate for this HTS code?',
-                    'type': 'slider',
-                    'min': 0,
-                    'max': 50,
-                    'unit': '%',
-                    'required': True,
-                    'help': f'For {origin_country} products: If Column 1 rate ≥15%, no reciprocal tariff applies. If <15%, reciprocal rate = 15% - Column 1 rate. This ensures total duty = max(Column 1 rate, 15%).'
-                })
-                question_index += 1
-
-            questions.append({
-                'id': 'is_humanitarian_donation',
-                'index': question_index,
-                'text': 'Is this a humanitarian donation (food, clothing, medicine)?',
-                'type': 'boolean',
-                'options': ['Yes', 'No'],
-                'required': True,
-                'help': 'Humanitarian donations are exempt from IEEPA Reciprocal tariff (exemption code: 9903.01.30)'
-            })
-            question_index += 1
-
-            questions.append({
-                'id': 'us_content_percentage',
-                'index': question_index,
-                'text': 'What percentage of the product value is U.S. content?',
-                'type': 'slider',
-                'min': 0,
-                'max': 100,
-                'unit': '%',
-                'required': True,
-                'help': 'Products with >20% U.S. content are exempt from IEEPA Reciprocal tariff (exemption code: 9903.01.34)'
-            })
-            question_index += 1
-
-            questions.append({
-                'id': 'is_informational_materials',
-                'index': question_index,
-                'text': 'Is this product informational materials (books, films, CDs, artwork)?',
-                'type': 'boolean',
-                'options': ['Yes', 'No'],
-                'required': True,
-                'help': 'Informational materials are exempt from IEEPA Reciprocal tariff (exemption code: 9903.01.21)'
-            })
-            question_index += 1
+            if origin_country in SPECIAL_CALCULATION_COUNTRIES:
+                questions.append(Question(
+                    id='column_1_duty_rate',
+                    index=len(questions),
+                    text=f'What is the Column 1 (MFN) duty rate for this HTS code?',
+                    type='slider',
+                    min=0,
+                    max=50,
+                    unit='%',
+                    required=True,
+                    help=f'For {origin_country} products: If Column 1 rate ≥15%, no reciprocal tariff applies. If <15%, reciprocal rate = 15% - Column 1 rate. This ensures total duty = max(Column 1 rate, 15%).'
+                ))
+
+            questions.append(replace(_HUMANITARIAN_QUESTION_TEMPLATE, index=len(questions)))
+            questions.append(replace(_US_CONTENT_QUESTION_TEMPLATE, index=len(questions)))
+            questions.append(replace(_INFORMATIONAL_MATERIALS_QUESTION_TEMPLATE, index=len(questions)))
 
     # IEEPA Fentanyl - NO QUESTIONS (always applies, no exemptions)
 
-    return questions
+    return tuple(questions)
 
 
 def parse_answer(answer, question_type):
@@ -267,15 +364,23 @@ def parse_answer(answer, question_type):
         Parsed value (bool, float, or string)
     """
     if question_type == 'boolean':
-        answer_str = str(answer).lower().strip()
-        return answer_str in ['yes', 'true', '1']
+        if isinstance(answer, bool):
+            return answer
+        return str(answer).lower().strip() in TRUTHY_ANSWERS
 
     elif question_type == 'slider':
+        # Numbers pass straight through (bool is excluded, as before); ints too large
+        # for a float fall back to the string path, which parses them as inf
+        if isinstance(answer, (int, float)) and not isinstance(answer, bool):
+            try:
+                return float(answer)
+            except OverflowError:
+                pass
         # Extract numeric value from string like "25%" or "25.0%"
-        answer_str = str(answer).replace('%', '').strip()
+        answer_str = (answer if isinstance(answer, str) else str(answer)).replace('%', '').strip()
         try:
             return float(answer_str)
-        except:
+        except ValueError:
             return 0.0
 
     elif question_type == 'country_select':
@@ -285,226 +390,201 @@ def parse_answer(answer, question_type):
     return answer
 
 
-def apply_section_232_steel_logic(tariff, answers, product_info):
+# Section 232 material decision tree parameters (steel, aluminum, copper, lumber)
+# - usmca: CA/MX origins can claim the USMCA exemption
+# - origin_key: answer holding the material's country of origin; materials with
+#   an origin question get the U.S.-processed exemption branch
+# - portion_note: reasoning suffix for materials without an origin question
+MATERIAL_232_CONFIG = {
+    'steel': {
+        'pct_key': 'steel_percentage',
+        'usmca': True,
+        'origin_key': 'steel_origin_country',
+        'us_process_key': 'steel_melted_poured_us',
+        'us_exempt_code': '9903.81.92',
+        'us_exempt_reason': 'Steel melted and poured in the United States',
+        'us_not_processed_reason': 'Steel from US but not melted/poured in US',
+        'label': 'Steel'
+    },
+    'aluminum': {
+        'pct_key': 'aluminum_percentage',
+        'usmca': True,
+        'origin_key': 'aluminum_origin_country',
+        'us_process_key': 'aluminum_smelted_cast_us',
+        'us_exempt_code': 'US_ORIGIN',
+        'us_exempt_reason': 'Aluminum smelted and cast in the United States',
+        'us_not_processed_reason': 'Aluminum from US but not smelted/cast in US',
+        'label': 'Aluminum'
+    },
+    'copper': {
+        'pct_key': 'copper_percentage',
+        'usmca': True,
+        'origin_key': None,
+        'portion_note': ' at 50% rate'  # Based on CBP guidance: 50% rate on copper derivatives
+    },
+    'lumber': {
+        'pct_key': 'lumber_percentage',
+        'usmca': False,  # Lumber Section 232 does NOT have USMCA exemptions per Yale data
+        'origin_key': None,
+        'portion_note': ' at 10% rate'  # Based on CBP guidance: 10% rate on softwood lumber
+    }
+}
+
+
+def _apply_material_232(material, tariff, answers, product_info, need_reasoning=True):
     """
-    Apply Section 232 Steel decision tree logic.
+    Shared Section 232 material decision tree, driven by MATERIAL_232_CONFIG.
 
     Args:
+        material: Key into MATERIAL_232_CONFIG ('steel', 'aluminum', 'copper', 'lumber')
         tariff: Tariff dict with code, name, rate, amount
         answers: Dict of {question_id: answer_value}
         product_info: Dict with origin_country, hs_code, value
+        need_reasoning: Build the reasoning text (False leaves it empty)
 
     Returns:
         Dict with excluded (bool), exemption_code, reasoning, final_amount
     """
+    config = MATERIAL_232_CONFIG[material]
     origin = product_info['origin_country']
-    result = {
-        'excluded': False,
-        'exemption_code': None,
-        'reasoning': '',
-        'final_amount': tariff['amount']
-    }
-
-    # Check if product has steel content
-    steel_pct = answers.get('steel_percentage', 0)
-    if steel_pct == 0:
-        result['excluded'] = True
-        result['exemption_code'] = 'N/A'
-        result['reasoning'] = 'NOT APPLICABLE: Product has 0% steel composition'
-        result['final_amount'] = 0
-        return result
+    origin_class = COUNTRY_CLASS.get(origin, COUNTRY_OTHER)
+
+    # Check if product has material content
+    material_pct = answers.get(config['pct_key'], 0)
+    if material_pct == 0:
+        return {
+            'excluded': True,
+            'exemption_code': 'N/A',
+            'reasoning': f'NOT APPLICABLE: Product has 0% {material} composition' if need_reasoning else '',
+            'final_amount': 0
+        }
 
     # CA/MX USMCA logic
-    if origin in ['CA', 'MX']:
+    if config['usmca'] and origin_class == COUNTRY_CA_MX:
         usmca_qualified = answers.get('usmca_qualified', False)
         if usmca_qualified:
-            result['excluded'] = True
-            result['exemption_code'] = '9903.01.26' if origin == 'CA' else '9903.01.27'
-            result['reasoning'] = f'EXEMPT: USMCA-qualified product from {origin}'
-            result['final_amount'] = 0
-        else:
-            result['reasoning'] = f'APPLIES: Product from {origin} does not qualify for USMCA exemption'
+            return {
+                'excluded': True,
+                'exemption_code': USMCA_EXEMPTION_CODES[origin],
+                'reasoning': f'EXEMPT: USMCA-qualified product from {origin}' if need_reasoning else '',
+                'final_amount': 0
+            }
+        if config['origin_key']:
+            return {
+                'excluded': False,
+                'exemption_code': None,
+                'reasoning': f'APPLIES: Product from {origin} does not qualify for USMCA exemption' if need_reasoning else '',
+                'final_amount': tariff['amount']
+            }
+        portion_note = config['portion_note']
 
-    # Other origins - check steel origin and US melting
-    else:
-        steel_origin = answers.get('steel_origin_country', '')
-
-        if steel_origin == 'US':
-            steel_melted_us = answers.get('steel_melted_poured_us', False)
-            if steel_melted_us:
-                result['excluded'] = True
-                result['exemption_code'] = '9903.81.92'
-                result['reasoning'] = 'EXEMPT: Steel melted and poured in the United States'
-                result['final_amount'] = 0
-            else:
-                # Apply to steel portion only
-                final_amount = product_info['value'] * (steel_pct / 100.0) * tariff['rate']
-                result['reasoning'] = f'APPLIES to {steel_pct:.1f}% steel portion: Steel from US but not melted/poured in US'
-                result['final_amount'] = final_amount
+    # Other origins - check material origin and US processing
+    elif config['origin_key']:
+        material_origin = answers.get(config['origin_key'], '')
+
+        if material_origin == 'US':
+            us_processed = answers.get(config['us_process_key'], False)
+            if us_processed:
+                return {
+                    'excluded': True,
+                    'exemption_code': config['us_exempt_code'],
+                    'reasoning': f"EXEMPT: {config['us_exempt_reason']}" if need_reasoning else '',
+                    'final_amount': 0
+                }
+            portion_note = f": {config['us_not_processed_reason']}"
         else:
-            # Apply to steel portion only
-            final_amount = product_info['value'] * (steel_pct / 100.0) * tariff['rate']
-            result['reasoning'] = f'APPLIES to {steel_pct:.1f}% steel portion: Steel from {steel_origin}'
-            result['final_amount'] = final_amount
+            portion_note = f": {config['label']} from {material_origin}"
 
-    return result
+    else:
+        portion_note = config['portion_note']
 
+    # Apply to material portion only
+    final_amount = product_info['value'] * (material_pct / 100.0) * tariff['rate']
 
-def apply_section_232_aluminum_logic(tariff, answers, product_info):
-    """
-    Apply Section 232 Aluminum decision tree logic.
-    """
-    origin = product_info['origin_country']
-    result = {
+    return {
         'excluded': False,
         'exemption_code': None,
-        'reasoning': '',
-        'final_amount': tariff['amount']
+        'reasoning': f'APPLIES to {material_pct:.1f}% {material} portion{portion_note}' if need_reasoning else '',
+        'final_amount': final_amount
     }
 
-    # Check if product has aluminum content
-    aluminum_pct = answers.get('aluminum_percentage', 0)
-    if aluminum_pct == 0:
-        result['excluded'] = True
-        result['exemption_code'] = 'N/A'
-        result['reasoning'] = 'NOT APPLICABLE: Product has 0% aluminum composition'
-        result['final_amount'] = 0
-        return result
 
-    # CA/MX USMCA logic
-    if origin in ['CA', 'MX']:
-        usmca_qualified = answers.get('usmca_qualified', False)
-        if usmca_qualified:
-            result['excluded'] = True
-            result['exemption_code'] = '9903.01.26' if origin == 'CA' else '9903.01.27'
-            result['reasoning'] = f'EXEMPT: USMCA-qualified product from {origin}'
-            result['final_amount'] = 0
-        else:
-            result['reasoning'] = f'APPLIES: Product from {origin} does not qualify for USMCA exemption'
+def apply_section_232_steel_logic(tariff, answers, product_info, need_reasoning=True):
+    """
+    Apply Section 232 Steel decision tree logic.
 
-    # Other origins - check aluminum origin and US smelting
-    else:
-        aluminum_origin = answers.get('aluminum_origin_country', '')
-
-        if aluminum_origin == 'US':
-            aluminum_smelted_us = answers.get('aluminum_smelted_cast_us', False)
-            if aluminum_smelted_us:
-                result['excluded'] = True
-                result['exemption_code'] = 'US_ORIGIN'
-                result['reasoning'] = 'EXEMPT: Aluminum smelted and cast in the United States'
-                result['final_amount'] = 0
-            else:
-                # Apply to aluminum portion only
-                final_amount = product_info['value'] * (aluminum_pct / 100.0) * tariff['rate']
-                result['reasoning'] = f'APPLIES to {aluminum_pct:.1f}% aluminum portion: Aluminum from US but not smelted/cast in US'
-                result['final_amount'] = final_amount
-        else:
-            # Apply to aluminum portion only
-            final_amount = product_info['value'] * (aluminum_pct / 100.0) * tariff['rate']
-            result['reasoning'] = f'APPLIES to {aluminum_pct:.1f}% aluminum portion: Aluminum from {aluminum_origin}'
-            result['final_amount'] = final_amount
+    Args:
+        tariff: Tariff dict with code, name, rate, amount
+        answers: Dict of {question_id: answer_value}
+        product_info: Dict with origin_country, hs_code, value
+        need_reasoning: Build the reasoning text (False leaves it empty)
 
-    return result
+    Returns:
+        Dict with excluded (bool), exemption_code, reasoning, final_amount
+    """
+    return _apply_material_232('steel', tariff, answers, product_info, need_reasoning)
 
 
-def apply_section_232_copper_logic(tariff, answers, product_info):
+def apply_section_232_aluminum_logic(tariff, answers, product_info, need_reasoning=True):
     """
-    Apply Section 232 Copper decision tree logic.
-    Based on CBP guidance: 50% rate on copper derivatives
+    Apply Section 232 Aluminum decision tree logic.
     """
-    origin = product_info['origin_country']
-    result = {
-        'excluded': False,
-        'exemption_code': None,
-        'reasoning': '',
-        'final_amount': tariff['amount']
-    }
+    return _apply_material_232('aluminum', tariff, answers, product_info, need_reasoning)
 
-    # Check if product has copper content
-    copper_pct = answers.get('copper_percentage', 0)
-    if copper_pct == 0:
-        result['excluded'] = True
-        result['exemption_code'] = 'N/A'
-        result['reasoning'] = 'NOT APPLICABLE: Product has 0% copper composition'
-        result['final_amount'] = 0
-        return result
-
-    # CA/MX USMCA logic (if applicable for copper)
-    if origin in ['CA', 'MX']:
-        usmca_qualified = answers.get('usmca_qualified', False)
-        if usmca_qualified:
-            result['excluded'] = True
-            result['exemption_code'] = '9903.01.26' if origin == 'CA' else '9903.01.27'
-            result['reasoning'] = f'EXEMPT: USMCA-qualified product from {origin}'
-            result['final_amount'] = 0
-        else:
-            # Apply to copper portion only (50% rate)
-            final_amount = product_info['value'] * (copper_pct / 100.0) * tariff['rate']
-            result['reasoning'] = f'APPLIES to {copper_pct:.1f}% copper portion at 50% rate'
-            result['final_amount'] = final_amount
-    else:
-        # Apply to copper portion only (50% rate)
-        final_amount = product_info['value'] * (copper_pct / 100.0) * tariff['rate']
-        result['reasoning'] = f'APPLIES to {copper_pct:.1f}% copper portion at 50% rate'
-        result['final_amount'] = final_amount
 
-    return result
+def apply_section_232_copper_logic(tariff, answers, product_info, need_reasoning=True):
+    """
+    Apply Section 232 Copper decision tree logic.
+    Based on CBP guidance: 50% rate on copper derivatives
+    """
+    return _apply_material_232('copper', tariff, answers, product_info, need_reasoning)
 
 
-def apply_section_232_lumber_logic(tariff, answers, product_info):
+def apply_section_232_lumber_logic(tariff, answers, product_info, need_reasoning=True):
     """
     Apply Section 232 Lumber/Softwood decision tree logic.
     Based on CBP guidance: 10% rate on softwood lumber
     """
-    origin = product_info['origin_country']
-    result = {
-        'excluded': False,
-        'exemption_code': None,
-        'reasoning': '',
-        'final_amount': tariff['amount']
-    }
-
-    # Check if product has lumber content
-    lumber_pct = answers.get('lumber_percentage', 0)
-    if lumber_pct == 0:
-        result['excluded'] = True
-        result['exemption_code'] = 'N/A'
-        result['reasoning'] = 'NOT APPLICABLE: Product has 0% lumber composition'
-        result['final_amount'] = 0
-        return result
-
-    # Lumber Section 232 does NOT have USMCA exemptions per Yale data
-    # Apply to lumber portion only (10% rate)
-    final_amount = product_info['value'] * (lumber_pct / 100.0) * tariff['rate']
-    result['reasoning'] = f'APPLIES to {lumber_pct:.1f}% lumber portion at 10% rate'
-    result['final_amount'] = final_amount
-
-    return result
+    return _apply_material_232('lumber', tariff, answers, product_info, need_reasoning)
 
 
-def apply_section_232_buses_logic(tariff, answers, product_info):
+def apply_section_232_buses_logic(tariff, answers, product_info, need_reasoning=True):
     """
     Apply Section 232 Buses (Heading 8702) decision tree logic.
     Based on CBP guidance: 10% rate, NO USMCA exemptions
     HTS Codes: 87021031, 87021061, 87022031, 87022061, 87023031, 87023061,
                87024031, 87024061, 87029031, 87029061
     """
-    result = {
+    # Buses Section 232 has NO USMCA exemptions per Yale data
+    # Simply apply 10% rate to full product value
+    # tariff['amount'] already calculated as value * rate, so use as-is
+    return {
         'excluded': False,
         'exemption_code': None,
-        'reasoning': '',
+        'reasoning': 'APPLIES: Section 232 Buses tariff at 10% rate (Heading 8702, no USMCA exemptions available)' if need_reasoning else '',
         'final_amount': tariff['amount']
     }
 
-    # Buses Section 232 has NO USMCA exemptions per Yale data
-    # Simply apply 10% rate to full product value
-    result['reasoning'] = 'APPLIES: Section 232 Buses tariff at 10% rate (Heading 8702, no USMCA exemptions available)'
-    # tariff['amount'] already calculated as value * rate, so use as-is
 
-    return result
+def _auto_compute(value, rate, usmca_qualified, usmca_share):
+    """
+    Numeric core of the Section 232 Automotive calculation.
 
+    Args:
+        value: Product value
+        rate: Base automotive tariff rate (decimal)
+        usmca_qualified: Whether the USMCA adjusted exemption applies
+        usmca_share: USMCA share for the origin (see USMCA_SHARES)
 
-def apply_section_232_automotive_logic(tariff, answers, product_info):
+    Returns:
+        Tuple of (final_rate, final_amount)
+    """
+    effective_rate = rate - AUTO_REBATE
+    final_rate = effective_rate * (1 - usmca_qualified * usmca_share * US_AUTO_CONTENT_SHARE)
+    return final_rate, value * final_rate
+
+
+def apply_section_232_automotive_logic(tariff, answers, product_info, need_reasoning=True):
     """
     Apply Section 232 Automotive decision tree logic.
     Based on CBP guidance: 25% base rate with auto rebate and USMCA adjustments
@@ -524,30 +604,12 @@ def apply_section_232_automotive_logic(tariff, answers, product_info):
        - Mexico: 71.45% * 40% = 28.58% exemption
     """
     origin = product_info['origin_country']
-    result = {
-        'excluded': False,
-        'exemption_code': None,
-        'reasoning': '',
-        'final_amount': tariff['amount']
-    }
+    origin_class = COUNTRY_CLASS.get(origin, COUNTRY_OTHER)
 
-    # Auto rebate parameters from Yale
-    AUTO_REBATE_RATE = 0.0375      # 3.75%
-    US_ASSEMBLY_SHARE = 0.33       # 33%
-    US_AUTO_CONTENT_SHARE = 0.40   # 40%
-
-    # USMCA shares for automotive (from Yale usmca_shares.csv)
-    USMCA_SHARES = {
-        'CA': 0.9136,  # 91.36%
-        'MX': 0.7145   # 71.45%
-    }
-
-    # Calculate auto rebate (applies to all automotive)
-    rebate = AUTO_REBATE_RATE * US_ASSEMBLY_SHARE  # 0.012375 (1.2375 percentage points)
-    effective_rate = tariff['rate'] - rebate  # 0.25 - 0.012375 = 0.237625
+    # Auto rebate applies to all automotive (0.25 - 0.012375 = 0.237625), see _auto_compute
 
     # CA/MX USMCA logic with adjusted share
-    if origin in ['CA', 'MX']:
+    if origin_class == COUNTRY_CA_MX:
         usmca_qualified = answers.get('usmca_qualified', False)
         if usmca_qualified:
             # Adjusted USMCA share for automotive = usmca_share * US content (40%)
@@ -555,121 +617,202 @@ def apply_section_232_automotive_logic(tariff, answers, product_info):
             adjusted_usmca_share = usmca_share * US_AUTO_CONTENT_SHARE
 
             # Apply exemption: rate * (1 - adjusted_share)
-            final_rate_after_exemption = effective_rate * (1 - adjusted_usmca_share)
-            final_amount = product_info['value'] * final_rate_after_exemption
-
-            result['excluded'] = True  # Partially exempt
-            result['exemption_code'] = '9903.01.26' if origin == 'CA' else '9903.01.27'
-            result['reasoning'] = (
-                f'PARTIALLY EXEMPT: USMCA-qualified automotive from {origin}. '
-                f'Base rate 25% - auto rebate 1.24% = 23.76%. '
-                f'USMCA adjusted exemption {adjusted_usmca_share*100:.2f}% '
-                f'({usmca_share*100:.2f}% share × 40% US content). '
-                f'Final effective rate: {final_rate_after_exemption*100:.2f}%'
+            final_rate_after_exemption, final_amount = _auto_compute(
+                product_info['value'], tariff['rate'], True, usmca_share
             )
-            result['final_amount'] = final_amount
-            return result
+
+            return {
+                'excluded': True,  # Partially exempt
+                'exemption_code': USMCA_EXEMPTION_CODES[origin],
+                'reasoning': (
+                    f'PARTIALLY EXEMPT: USMCA-qualified automotive from {origin}. '
+                    f'Base rate 25% - auto rebate 1.24% = 23.76%. '
+                    f'USMCA adjusted exemption {adjusted_usmca_share*100:.2f}% '
+                    f'({usmca_share*100:.2f}% share × 40% US content). '
+                    f'Final effective rate: {final_rate_after_exemption*100:.2f}%'
+                ) if need_reasoning else '',
+                'final_amount': final_amount
+            }
         else:
             # USMCA not qualified - apply rebated rate
-            final_amount = product_info['value'] * effective_rate
-            result['reasoning'] = (
-                f'APPLIES: Automotive from {origin} (not USMCA-qualified). '
-                f'Rate: 25% - auto rebate 1.24% = {effective_rate*100:.4f}%'
-            )
-            result['final_amount'] = final_amount
-            return result
+            effective_rate, final_amount = _auto_compute(product_info['value'], tariff['rate'], False, 0.0)
+            return {
+                'excluded': False,
+                'exemption_code': None,
+                'reasoning': (
+                    f'APPLIES: Automotive from {origin} (not USMCA-qualified). '
+                    f'Rate: 25% - auto rebate 1.24% = {effective_rate*100:.4f}%'
+                ) if need_reasoning else '',
+                'final_amount': final_amount
+            }
     else:
         # Other origins - apply rebated rate only
-        final_amount = product_info['value'] * effective_rate
-        result['reasoning'] = (
-            f'APPLIES: Automotive tariff with US assembly rebate. '
-            f'Rate: 25% - 1.24% = {effective_rate*100:.4f}%'
-        )
-        result['final_amount'] = final_amount
-        return result
+        effective_rate, final_amount = _auto_compute(product_info['value'], tariff['rate'], False, 0.0)
+        return {
+            'excluded': False,
+            'exemption_code': None,
+            'reasoning': (
+                f'APPLIES: Automotive tariff with US assembly rebate. '
+                f'Rate: 25% - 1.24% = {effective_rate*100:.4f}%'
+            ) if need_reasoning else '',
+            'final_amount': final_amount
+        }
 
 
-def apply_section_301_logic(tariff, answers, product_info):
+@functools.lru_cache(maxsize=256)
+def _not_from_cn_hk_mo_result(origin, need_reasoning=True):
+    """Shared read-only result for a CN/HK/MO-only tariff on a product from elsewhere"""
+    return MappingProxyType({
+        'excluded': True,
+        'exemption_code': 'N/A',
+        'reasoning': f'NOT APPLICABLE: Product not from China/Hong Kong/Macau (origin: {origin})' if need_reasoning else '',
+        'final_amount': 0
+    })
+
+
+def apply_section_301_logic(tariff, answers, product_info, need_reasoning=True):
     """
     Apply Section 301 decision tree logic.
     """
-    result = {
-        'excluded': False,
-        'exemption_code': None,
-        'reasoning': '',
-        'final_amount': tariff['amount']
-    }
-
     # Only applies to CN/HK/MO
     origin = product_info['origin_country']
-    if origin not in ['CN', 'HK', 'MO']:
-        result['excluded'] = True
-        result['exemption_code'] = 'N/A'
-        result['reasoning'] = f'NOT APPLICABLE: Product not from China/Hong Kong/Macau (origin: {origin})'
-        result['final_amount'] = 0
-        return result
+    if COUNTRY_CLASS.get(origin, COUNTRY_OTHER) != COUNTRY_CN_HK_MO:
+        return dict(_not_from_cn_hk_mo_result(origin, need_reasoning))
 
     # Check USTR product exclusion
     ustr_exclusion = answers.get('ustr_product_exclusion', False)
     if ustr_exclusion:
-        result['excluded'] = True
-        result['exemption_code'] = '9903.88.69'
-        result['reasoning'] = 'EXEMPT: Product matches one of 164 USTR product-specific exclusions'
-        result['final_amount'] = 0
-        return result
+        return {
+            'excluded': True,
+            'exemption_code': '9903.88.69',
+            'reasoning': 'EXEMPT: Product matches one of 164 USTR product-specific exclusions' if need_reasoning else '',
+            'final_amount': 0
+        }
 
     # Check manufacturing equipment exclusion
     manufacturing_equipment = answers.get('ustr_manufacturing_equipment', False)
     if manufacturing_equipment:
-        result['excluded'] = True
-        result['exemption_code'] = '9903.88.70'
-        result['reasoning'] = 'EXEMPT: Product classified as manufacturing equipment'
-        result['final_amount'] = 0
-        return result
+        return {
+            'excluded': True,
+            'exemption_code': '9903.88.70',
+            'reasoning': 'EXEMPT: Product classified as manufacturing equipment' if need_reasoning else '',
+            'final_amount': 0
+        }
 
     # No exemptions apply
-    result['reasoning'] = f'APPLIES: Product from {origin}, no USTR exclusions apply'
-    return result
+    return {
+        'excluded': False,
+        'exemption_code': None,
+        'reasoning': f'APPLIES: Product from {origin}, no USTR exclusions apply' if need_reasoning else '',
+        'final_amount': tariff['amount']
+    }
 
 
-def apply_ieepa_reciprocal_logic(tariff, answers, product_info, section_232_results=None):
+# Outcome codes of the IEEPA Reciprocal numeric core (_reciprocal_compute)
+RECIPROCAL_APPLIES = 0
+RECIPROCAL_MATERIALS_OVER_100 = 1     # Section 232 material percentages exceed 100%
+RECIPROCAL_ALL_232 = 2                # 100% Section 232 materials (9903.01.33)
+RECIPROCAL_US_CONTENT_OVER_100 = 3    # US content percentage exceeds 100%
+RECIPROCAL_US_CONTENT_EXEMPT = 4      # >20% US content (9903.01.34)
+
+
+def _reciprocal_compute(value, total_232_material_pct, us_content, rate):
     """
-    Apply IEEPA Reciprocal decision tree logic.
-    CRITICAL: Applies only to NON-232 portion of product value.
+    Numeric core of the IEEPA Reciprocal calculation (non-EU/JP/KR path).
 
     Args:
-        section_232_results: Dict of {material: analysis_result} from Section 232 evaluation
-                            Used to determine what percentage is exempt per 9903.01.33
+        value: Product value
+        total_232_material_pct: Percentage of value covered by applied Section 232 materials
+        us_content: US content percentage
+        rate: Reciprocal tariff rate (decimal)
+
+    Returns:
+        Tuple of (outcome code, non_232_pct, final_amount); final_amount is 0.0 unless RECIPROCAL_APPLIES
     """
-    result = {
-        'excluded': False,
-        'exemption_code': None,
-        'reasoning': '',
-        'final_amount': tariff['amount']
-    }
+    non_232_pct = 100 - total_232_material_pct
+    if total_232_material_pct > 100:
+        return RECIPROCAL_MATERIALS_OVER_100, non_232_pct, 0.0
+    if non_232_pct <= 0:
+        return RECIPROCAL_ALL_232, non_232_pct, 0.0
+    if us_content > 100:
+        return RECIPROCAL_US_CONTENT_OVER_100, non_232_pct, 0.0
+    if us_content > 20:
+        return RECIPROCAL_US_CONTENT_EXEMPT, non_232_pct, 0.0
+    return RECIPROCAL_APPLIES, non_232_pct, value * (non_232_pct / 100.0) * rate
 
-    if section_232_results is None:
-        section_232_results = {}
 
+def apply_ieepa_reciprocal_logic(tariff, answers, product_info, need_reasoning=True, *, material_pcts=None):
+    """
+    Apply IEEPA Reciprocal decision tree logic.
+    CRITICAL: Applies only to NON-232 portion of product value.
+
+    Args:
+        need_reasoning: Build the reasoning text (False leaves it empty)
+        material_pcts: Dict of {material: percentage} for Section 232 material tariffs that applied
+                       Used to determine what percentage is exempt per 9903.01.33 (keyword-only)
+    """
     # Check Column 2 rate countries exemption (9903.01.29)
     # Belarus, Cuba, North Korea, Russia
     origin = product_info['origin_country']
-    column_2_countries = ['BY', 'CU', 'KP', 'RU']
-    if origin in column_2_countries:
-        result['excluded'] = True
-        result['exemption_code'] = '9903.01.29'
-        result['reasoning'] = f'EXEMPT: Product from Column 2 rate country ({origin})'
-        result['final_amount'] = 0
-        return result
+    origin_class = COUNTRY_CLASS.get(origin, COUNTRY_OTHER)
+    if origin_class == COUNTRY_COLUMN_2:
+        return {
+            'excluded': True,
+            'exemption_code': '9903.01.29',
+            'reasoning': f'EXEMPT: Product from Column 2 rate country ({origin})' if need_reasoning else '',
+            'final_amount': 0
+        }
 
     # Check humanitarian donations exemption (9903.01.30)
     is_humanitarian = answers.get('is_humanitarian_donation', False)
     if is_humanitarian:
-        result['excluded'] = True
-        result['exemption_code'] = '9903.01.30'
-        result['reasoning'] = 'EXEMPT: Humanitarian donation (food, clothing, medicine)'
-        result['final_amount'] = 0
-        return result
+        return {
+            'excluded': True,
+            'exemption_code': '9903.01.30',
+            'reasoning': 'EXEMPT: Humanitarian donation (food, clothing, medicine)' if need_reasoning else '',
+            'final_amount': 0
+        }
+
+    # Calculate total Section 232-covered materials percentage
+    # Based on CBP guidance: Section 232 and IEEPA Reciprocal are MUTUALLY EXCLUSIVE
+    # Section 232 applies to: steel, aluminum, copper, lumber (and automotive, buses)
+    # IEEPA Reciprocal applies ONLY to the non-232 portion (exemption 9903.01.33)
+    #
+    # CRITICAL: material_pcts only holds materials whose Section 232 tariff ACTUALLY applied
+    # (collected by analyze_stacking), NOT every material percentage in the answers
+    # (e.g., automotive products don't get material-based 232, so they don't get 9903.01.33 exemption)
+
+    if material_pcts is None:
+        material_pcts = {}
+
+    total_232_material_pct = sum(material_pcts.values())
+    us_content = answers.get('us_content_percentage', 0)
+    outcome, non_232_pct, final_amount = _reciprocal_compute(
+        product_info['value'], total_232_material_pct, us_content, tariff['rate']
+    )
+
+    # Validation: Total material percentages cannot exceed 100%
+    if outcome == RECIPROCAL_MATERIALS_OVER_100:
+        logger.error("Material percentage validation failed: %s%% > 100%%", total_232_material_pct)
+        return {
+            'excluded': False,
+            'exemption_code': None,
+            'reasoning': (
+                f'ERROR: Total Section 232 material percentages exceed 100%. '
+                f'Steel: {material_pcts.get("steel", 0)}%, Aluminum: {material_pcts.get("aluminum", 0)}%, '
+                f'Copper: {material_pcts.get("copper", 0)}%, Lumber: {material_pcts.get("lumber", 0)}%. '
+                f'Total: {total_232_material_pct}%. Please verify composition percentages.'
+            ) if need_reasoning else '',
+            'final_amount': 0
+        }
+
+    if outcome == RECIPROCAL_ALL_232:
+        return {
+            'excluded': True,
+            'exemption_code': '9903.01.33',
+            'reasoning': 'EXEMPT: Product is 100% Section 232 materials (exemption 9903.01.33 - metal portion exempt)' if need_reasoning else '',
+            'final_amount': 0
+        }
 
     # EU, Japan, South Korea Special Calculation (15% threshold rule)
     # Per CSMS #65829726 and trade agreements:
@@ -677,179 +820,195 @@ def apply_ieepa_reciprocal_logic(tariff, answers, product_info, section_232_resu
     # - If Column 1 (MFN) rate < 15%: reciprocal rate = 15% - Column 1 rate
     # This ensures total duty = max(Column 1 rate, 15%)
 
-    eu_countries = ['AT', 'BE', 'BG', 'HR', 'CY', 'CZ', 'DK', 'EE', 'FI', 'FR',
-                    'DE', 'GR', 'HU', 'IE', 'IT', 'LV', 'LT', 'LU', 'MT', 'NL',
-                    'PL', 'PT', 'RO', 'SK', 'SI', 'ES', 'SE']
-
-    special_calculation_countries = eu_countries + ['JP', 'KR']
-
-    if origin in special_calculation_countries:
+    if origin_class == COUNTRY_SPECIAL_CALCULATION:
         # Get Column 1 (MFN) duty rate from answers
         column_1_rate = answers.get('column_1_duty_rate', None)
 
         if column_1_rate is None:
             # Column 1 rate not provided - cannot calculate adjusted reciprocal rate
-            result['excluded'] = False
-            result['exemption_code'] = None
-            result['reasoning'] = (
-                f'REQUIRES DATA: Product from {origin} requires Column 1 (MFN) duty rate '
-                f'to calculate adjusted reciprocal tariff. '
-                f'Rule: If MFN ≥15% then reciprocal=0%; if MFN <15% then reciprocal=15%-MFN. '
-                f'Please provide the Column 1 duty rate for this HTS code.'
-            )
-            result['final_amount'] = 0
-            logger.warning(f"Column 1 rate required for {origin} but not provided")
-            return result
+            logger.warning("Column 1 rate required for %s but not provided", origin)
+            return {
+                'excluded': False,
+                'exemption_code': None,
+                'reasoning': (
+                    f'REQUIRES DATA: Product from {origin} requires Column 1 (MFN) duty rate '
+                    f'to calculate adjusted reciprocal tariff. '
+                    f'Rule: If MFN ≥15% then reciprocal=0%; if MFN <15% then reciprocal=15%-MFN. '
+                    f'Please provide the Column 1 duty rate for this HTS code.'
+                ) if need_reasoning else '',
+                'final_amount': 0
+            }
+
+        column_1_str = f'{column_1_rate:.2f}%'
 
         # Calculate adjusted reciprocal rate based on 15% threshold
         if column_1_rate >= 15:
             # Column 1 rate already meets or exceeds 15%, so NO reciprocal tariff
-            result['excluded'] = True
-            result['exemption_code'] = 'N/A'
-            result['reasoning'] = (
-                f'EXEMPT: {origin} product with Column 1 (MFN) rate of {column_1_rate:.2f}% '
-                f'(≥15% threshold). No reciprocal tariff applied. '
-                f'Total duty = {column_1_rate:.2f}% (Column 1 only)'
-            )
-            result['final_amount'] = 0
-            return result
+            return {
+                'excluded': True,
+                'exemption_code': 'N/A',
+                'reasoning': (
+                    f'EXEMPT: {origin} product with Column 1 (MFN) rate of {column_1_str} '
+                    f'(≥15% threshold). No reciprocal tariff applied. '
+                    f'Total duty = {column_1_str} (Column 1 only)'
+                ) if need_reasoning else '',
+                'final_amount': 0
+            }
         else:
             # Column 1 rate < 15%, apply adjusted reciprocal rate
             adjusted_reciprocal_rate = (15 - column_1_rate) / 100.0  # Convert to decimal
+            adjusted_str = f'{adjusted_reciprocal_rate*100:.2f}%'
 
             # Apply to non-232 portion only
             final_amount = product_info['value'] * (non_232_pct / 100.0) * adjusted_reciprocal_rate
 
-            result['reasoning'] = (
-                f'APPLIES (ADJUSTED): {origin} product with Column 1 (MFN) rate {column_1_rate:.2f}%. '
-                f'Adjusted reciprocal rate = 15% - {column_1_rate:.2f}% = {adjusted_reciprocal_rate*100:.2f}%. '
-                f'Applied to {non_232_pct:.1f}% non-232 portion. '
-                f'Total duty = {column_1_rate:.2f}% (Column 1) + {adjusted_reciprocal_rate*100:.2f}% (Reciprocal) = 15%'
-            )
-            result['final_amount'] = final_amount
-            return result
+            return {
+                'excluded': False,
+                'exemption_code': None,
+                'reasoning': (
+                    f'APPLIES (ADJUSTED): {origin} product with Column 1 (MFN) rate {column_1_str}. '
+                    f'Adjusted reciprocal rate = 15% - {column_1_str} = {adjusted_str}. '
+                    f'Applied to {non_232_pct:.1f}% non-232 portion. '
+                    f'Total duty = {column_1_str} (Column 1) + {adjusted_str} (Reciprocal) = 15%'
+                ) if need_reasoning else '',
+                'final_amount': final_amount
+            }
 
     # Only applies to CN/HK/MO at 10% (and other countries per bulletin)
     # Note: Per bulletin, China continues at 10% under 9903.01.25
 
-    # Calculate total Section 232-covered materials percentage
-    # Based on CBP guidance: Section 232 and IEEPA Reciprocal are MUTUALLY EXCLUSIVE
-    # Section 232 applies to: steel, aluminum, copper, lumber (and automotive, buses)
-    # IEEPA Reciprocal applies ONLY to the non-232 portion (exemption 9903.01.33)
-    #
-    # CRITICAL: We use Section 232 results from earlier evaluation, NOT just material percentages
-    # This ensures we only exempt what ACTUALLY got Section 232 tariffs applied
-    # (e.g., automotive products don't get material-based 232, so they don't get 9903.01.33 exemption)
-
-    steel_pct = 0
-    aluminum_pct = 0
-    copper_pct = 0
-    lumber_pct = 0
-
-    # Check which Section 232 tariffs actually applied (not excluded)
-    if 'steel' in section_232_results and not section_232_results['steel'].get('excluded', False):
-        steel_pct = answers.get('steel_percentage', 0)
-
-    if 'aluminum' in section_232_results and not section_232_results['aluminum'].get('excluded', False):
-        aluminum_pct = answers.get('aluminum_percentage', 0)
-
-    if 'copper' in section_232_results and not section_232_results['copper'].get('excluded', False):
-        copper_pct = answers.get('copper_percentage', 0)
-
-    if 'lumber' in section_232_results and not section_232_results['lumber'].get('excluded', False):
-        lumber_pct = answers.get('lumber_percentage', 0)
-
-    total_232_material_pct = steel_pct + aluminum_pct + copper_pct + lumber_pct
-
-    # Validation: Total material percentages cannot exceed 100%
-    if total_232_material_pct > 100:
-        result['excluded'] = False
-        result['exemption_code'] = None
-        result['reasoning'] = (
-            f'ERROR: Total Section 232 material percentages exceed 100%. '
-            f'Steel: {steel_pct}%, Aluminum: {aluminum_pct}%, '
-            f'Copper: {copper_pct}%, Lumber: {lumber_pct}%. '
-            f'Total: {total_232_material_pct}%. Please verify composition percentages.'
-        )
-        result['final_amount'] = 0
-        logger.error(f"Material percentage validation failed: {total_232_material_pct}% > 100%")
-        return result
-
-    non_232_pct = 100 - total_232_material_pct
-
-    if non_232_pct <= 0:
-        result['excluded'] = True
-        result['exemption_code'] = '9903.01.33'
-        result['reasoning'] = 'EXEMPT: Product is 100% Section 232 materials (exemption 9903.01.33 - metal portion exempt)'
-        result['final_amount'] = 0
-        return result
-
-    # Check US content exemption
-    us_content = answers.get('us_content_percentage', 0)
-
+    # Check US content exemption (outcome computed by _reciprocal_compute above)
     # Validation: US content percentage should be reasonable
-    if us_content > 100:
-        result['excluded'] = False
-        result['exemption_code'] = None
-        result['reasoning'] = (
-            f'ERROR: US content percentage ({us_content}%) cannot exceed 100%. '
-            f'Please verify the US content value.'
-        )
-        result['final_amount'] = 0
-        logger.error(f"US content validation failed: {us_content}% > 100%")
-        return result
+    if outcome == RECIPROCAL_US_CONTENT_OVER_100:
+        logger.error("US content validation failed: %s%% > 100%%", us_content)
+        return {
+            'excluded': False,
+            'exemption_code': None,
+            'reasoning': (
+                f'ERROR: US content percentage ({us_content}%) cannot exceed 100%. '
+                f'Please verify the US content value.'
+            ) if need_reasoning else '',
+            'final_amount': 0
+        }
 
-    if us_content > 20:
-        result['excluded'] = True
-        result['exemption_code'] = '9903.01.34'
-        result['reasoning'] = f'EXEMPT: Product has {us_content:.1f}% U.S. content (>20% threshold)'
-        result['final_amount'] = 0
-        return result
+    if outcome == RECIPROCAL_US_CONTENT_EXEMPT:
+        return {
+            'excluded': True,
+            'exemption_code': '9903.01.34',
+            'reasoning': f'EXEMPT: Product has {us_content:.1f}% U.S. content (>20% threshold)' if need_reasoning else '',
+            'final_amount': 0
+        }
 
     # Check informational materials exemption
     is_informational = answers.get('is_informational_materials', False)
     if is_informational:
-        result['excluded'] = True
-        result['exemption_code'] = '9903.01.21'
-        result['reasoning'] = 'EXEMPT: Product is informational materials (books, films, CDs, artwork)'
-        result['final_amount'] = 0
-        return result
-
-    # Apply to non-Section 232 portion only (mutual exclusivity)
-    final_amount = product_info['value'] * (non_232_pct / 100.0) * tariff['rate']
-    result['reasoning'] = f'APPLIES to NON-232 portion only: {non_232_pct:.1f}% of product value (Section 232 materials {total_232_material_pct:.1f}% are mutually exclusive per exemption 9903.01.33)'
-    result['final_amount'] = final_amount
+        return {
+            'excluded': True,
+            'exemption_code': '9903.01.21',
+            'reasoning': 'EXEMPT: Product is informational materials (books, films, CDs, artwork)' if need_reasoning else '',
+            'final_amount': 0
+        }
 
-    return result
+    # final_amount (from _reciprocal_compute) covers the non-Section 232 portion only (mutual exclusivity)
+    return {
+        'excluded': False,
+        'exemption_code': None,
+        'reasoning': f'APPLIES to NON-232 portion only: {non_232_pct:.1f}% of product value (Section 232 materials {total_232_material_pct:.1f}% are mutually exclusive per exemption 9903.01.33)' if need_reasoning else '',
+        'final_amount': final_amount
+    }
 
 
-def apply_ieepa_fentanyl_logic(tariff, answers, product_info):
+def apply_ieepa_fentanyl_logic(tariff, answers, product_info, need_reasoning=True):
     """
     Apply IEEPA Fentanyl decision tree logic.
     CRITICAL: Always applies to 100% of product value, NO exemptions.
     """
-    result = {
+    # Only applies to CN/HK/MO (the N/A result depends on origin alone, so it is cached)
+    origin = product_info['origin_country']
+    if COUNTRY_CLASS.get(origin, COUNTRY_OTHER) != COUNTRY_CN_HK_MO:
+        return dict(_not_from_cn_hk_mo_result(origin, need_reasoning))
+
+    # No exemptions - always applies
+    return {
         'excluded': False,
         'exemption_code': None,
-        'reasoning': '',
+        'reasoning': 'APPLIES: IEEPA Fentanyl tariff on 100% of product value (no exemptions available)' if need_reasoning else '',
         'final_amount': tariff['amount']
     }
 
-    # Only applies to CN/HK/MO
-    origin = product_info['origin_country']
-    if origin not in ['CN', 'HK', 'MO']:
-        result['excluded'] = True
-        result['exemption_code'] = 'N/A'
-        result['reasoning'] = f'NOT APPLICABLE: Product not from China/Hong Kong/Macau (origin: {origin})'
-        result['final_amount'] = 0
-        return result
 
-    # No exemptions - always applies
-    result['reasoning'] = f'APPLIES: IEEPA Fentanyl tariff on 100% of product value (no exemptions available)'
-    return result
+def _apply_unknown_category_logic(tariff, answers, product_info, need_reasoning=True):
+    """
+    Fallback for categories without a decision tree - apply the tariff as-is.
+    """
+    return {
+        'excluded': False,
+        'exemption_code': None,
+        'reasoning': f'APPLIES: {tariff["name"]} (category: {tariff["category"]})' if need_reasoning else '',
+        'final_amount': tariff['amount']
+    }
 
 
-def analyze_stacking(tariffs, answers, product_info):
+# Decision-tree function per tariff category
+# All take (tariff, answers, product_info, need_reasoning=True); apply_ieepa_reciprocal_logic
+# additionally takes the applied Section 232 material percentages as keyword-only material_pcts
+APPLY_DISPATCH = {
+    'section_301': apply_section_301_logic,
+    'ieepa_fentanyl': apply_ieepa_fentanyl_logic,
+    'section_232_automotive': apply_section_232_automotive_logic,
+    'section_232_buses': apply_section_232_buses_logic,
+    'section_232_steel': apply_section_232_steel_logic,
+    'section_232_aluminum': apply_section_232_aluminum_logic,
+    'section_232_copper': apply_section_232_copper_logic,
+    'section_232_lumber': apply_section_232_lumber_logic,
+    'ieepa_reciprocal': apply_ieepa_reciprocal_logic
+}
+
+# Material tariff category -> (MATERIAL_232_CONFIG key, decision-tree function)
+_MATERIAL_232_HANDLERS = {
+    'section_232_steel': ('steel', apply_section_232_steel_logic),
+    'section_232_aluminum': ('aluminum', apply_section_232_aluminum_logic),
+    'section_232_copper': ('copper', apply_section_232_copper_logic),
+    'section_232_lumber': ('lumber', apply_section_232_lumber_logic)
+}
+
+# Material-composition Section 232 tariffs vs. HTS code-based ones (mutually exclusive)
+MATERIAL_232 = frozenset(_MATERIAL_232_HANDLERS)
+HTS_232 = frozenset({'section_232_automotive', 'section_232_buses'})
+
+# analyze_stacking settles material vs. HTS-based exclusivity in a single pass over the
+# bucketed tariffs, which relies on every HTS-based category being evaluated first
+if max(STACKING_ORDER[c] for c in HTS_232) > min(STACKING_ORDER[c] for c in MATERIAL_232):
+    raise ValueError('STACKING_ORDER must place HTS-based Section 232 categories before material-based ones')
+
+# Tariffs that only apply to China/Hong Kong/Macau origins
+CN_HK_MO_ONLY_CATEGORIES = frozenset({'section_301', 'ieepa_fentanyl'})
+
+# Result for a material tariff displaced by an applicable automotive/buses tariff
+# (read-only, shared by every such tariff - it is only merged into the result dict)
+_HTS_EXCLUDED_RESULT = MappingProxyType({
+    'excluded': True,
+    'exemption_code': 'N/A',
+    'reasoning': 'NOT APPLICABLE: Product already covered under Section 232 Automotive/Buses HTS code classification. Material composition tariffs do not apply when HTS-based 232 tariff applies.',
+    'final_amount': 0
+})
+_HTS_EXCLUDED_RESULT_NO_REASONING = MappingProxyType({**_HTS_EXCLUDED_RESULT, 'reasoning': ''})
+
+
+def _in_stacking_order(tariffs):
+    """
+    Order tariffs (or analyzed results) by CBP stacking order.
+
+    Unknown categories go last; input order is kept within a category.
+    """
+    buckets = {category: [] for category in STACKING_ORDER_TUPLE}
+    unknown = []
+    for tariff in tariffs:
+        buckets.get(tariff['category'], unknown).append(tariff)
+    return [tariff for category in STACKING_ORDER_TUPLE for tariff in buckets[category]] + unknown
+
+
+def analyze_stacking(tariffs, answers, product_info, need_reasoning=True):
     """
     Main orchestration function for stacking analysis.
 
@@ -857,129 +1016,77 @@ def analyze_stacking(tariffs, answers, product_info):
         tariffs: List of detected punitive tariffs
         answers: Dict of {question_id: answer_value}
         product_info: Dict with origin_country, hs_code, value
+        need_reasoning: Build the reasoning text (False leaves it empty, e.g. for totals-only callers)
 
     Returns:
         List of analyzed tariffs in CBP stacking order with reasoning
     """
     results = []
 
+    # Origin lookups go through COUNTRY_CLASS / caches, so a malformed (unhashable) origin
+    # is coerced to a string - it matches no country either way
+    origin = product_info.get('origin_country')
+    if origin is not None and not isinstance(origin, str):
+        origin = str(origin)
+        product_info = {**product_info, 'origin_country': origin}
+
+    # Section 301 and IEEPA Fentanyl are decided by origin alone outside CN/HK/MO
+    cn_hk_mo_origin = COUNTRY_CLASS.get(origin, COUNTRY_OTHER) == COUNTRY_CN_HK_MO
+
     # CRITICAL: Track if HTS code-based Section 232 tariffs apply
     # If automotive or buses applies, material-based 232 tariffs are EXCLUDED
     hts_based_232_applies = False
 
-    # CRITICAL: Track which Section 232 tariffs actually applied (not excluded)
+    # CRITICAL: Track which Section 232 material tariffs actually applied (not excluded)
     # This is needed for IEEPA Reciprocal exemption 9903.01.33 calculation
-    section_232_results = {}  # {category: analysis_result}
+    material_pcts = {}  # {material: percentage}
 
-    # Sort tariffs by CBP stacking order
-    sorted_tariffs = sorted(
-        tariffs,
-        key=lambda t: STACKING_ORDER.get(t['category'], 999)
-    )
+    # Sort tariffs by CBP stacking order (unknown categories go last)
+    sorted_tariffs = _in_stacking_order(tariffs)
 
     for tariff in sorted_tariffs:
         category = tariff['category']
 
-        logger.info(f"Analyzing {category}: {tariff['name']}")
+        logger.info("Analyzing %s: %s", category, tariff['name'])
 
         # Apply category-specific logic
-        if category == 'section_232_automotive':
-            analysis = apply_section_232_automotive_logic(tariff, answers, product_info)
-            # If automotive tariff applies (not excluded), mark HTS-based 232 as active
-            if not analysis.get('excluded', False):
-                hts_based_232_applies = True
-                logger.info("  → Automotive Section 232 applies - material-based 232 tariffs will be excluded")
-
-        elif category == 'section_232_buses':
-            analysis = apply_section_232_buses_logic(tariff, answers, product_info)
-            # If buses tariff applies (not excluded), mark HTS-based 232 as active
-            if not analysis.get('excluded', False):
-                hts_based_232_applies = True
-                logger.info("  → Buses Section 232 applies - material-based 232 tariffs will be excluded")
-
-        elif category == 'section_232_steel':
+        if category in MATERIAL_232:
             # MUTUAL EXCLUSIVITY: If automotive/buses applies, skip material-based tariffs
             if hts_based_232_applies:
-                analysis = {
-                    'excluded': True,
-                    'exemption_code': 'N/A',
-                    'reasoning': 'NOT APPLICABLE: Product already covered under Section 232 Automotive/Buses HTS code classification. Material composition tariffs do not apply when HTS-based 232 tariff applies.',
-                    'final_amount': 0
-                }
-                logger.info("  → EXCLUDED due to HTS-based Section 232 priority")
-            else:
-                analysis = apply_section_232_steel_logic(tariff, answers, product_info)
-                section_232_results['steel'] = analysis
-
-        elif category == 'section_232_aluminum':
-            # MUTUAL EXCLUSIVITY: If automotive/buses applies, skip material-based tariffs
-            if hts_based_232_applies:
-                analysis = {
-                    'excluded': True,
-                    'exemption_code': 'N/A',
-                    'reasoning': 'NOT APPLICABLE: Product already covered under Section 232 Automotive/Buses HTS code classification. Material composition tariffs do not apply when HTS-based 232 tariff applies.',
-                    'final_amount': 0
-                }
-                logger.info("  → EXCLUDED due to HTS-based Section 232 priority")
-            else:
-                analysis = apply_section_232_aluminum_logic(tariff, answers, product_info)
-                section_232_results['aluminum'] = analysis
-
-        elif category == 'section_232_copper':
-            # MUTUAL EXCLUSIVITY: If automotive/buses applies, skip material-based tariffs
-            if hts_based_232_applies:
-                analysis = {
-                    'excluded': True,
-                    'exemption_code': 'N/A',
-                    'reasoning': 'NOT APPLICABLE: Product already covered under Section 232 Automotive/Buses HTS code classification. Material composition tariffs do not apply when HTS-based 232 tariff applies.',
-                    'final_amount': 0
-                }
+                analysis = _HTS_EXCLUDED_RESULT if need_reasoning else _HTS_EXCLUDED_RESULT_NO_REASONING
                 logger.info("  → EXCLUDED due to HTS-based Section 232 priority")
             else:
-                analysis = apply_section_232_copper_logic(tariff, answers, product_info)
-                section_232_results['copper'] = analysis
-
-        elif category == 'section_232_lumber':
-            # MUTUAL EXCLUSIVITY: If automotive/buses applies, skip material-based tariffs
-            if hts_based_232_applies:
-                analysis = {
-                    'excluded': True,
-                    'exemption_code': 'N/A',
-                    'reasoning': 'NOT APPLICABLE: Product already covered under Section 232 Automotive/Buses HTS code classification. Material composition tariffs do not apply when HTS-based 232 tariff applies.',
-                    'final_amount': 0
-                }
-                logger.info("  → EXCLUDED due to HTS-based Section 232 priority")
-            else:
-                analysis = apply_section_232_lumber_logic(tariff, answers, product_info)
-                section_232_results['lumber'] = analysis
-
-        elif category == 'section_301':
-            analysis = apply_section_301_logic(tariff, answers, product_info)
+                material, handler = _MATERIAL_232_HANDLERS[category]
+                analysis = handler(tariff, answers, product_info, need_reasoning)
+                if analysis['excluded']:
+                    material_pcts.pop(material, None)
+                else:
+                    material_pcts[material] = answers.get(MATERIAL_232_CONFIG[material]['pct_key'], 0)
 
         elif category == 'ieepa_reciprocal':
-            # Pass Section 232 results for exemption 9903.01.33 calculation
-            analysis = apply_ieepa_reciprocal_logic(tariff, answers, product_info, section_232_results)
+            # Pass applied Section 232 material percentages for exemption 9903.01.33 calculation
+            analysis = apply_ieepa_reciprocal_logic(tariff, answers, product_info, need_reasoning, material_pcts=material_pcts)
 
-        elif category == 'ieepa_fentanyl':
-            analysis = apply_ieepa_fentanyl_logic(tariff, answers, product_info)
+        elif category in CN_HK_MO_ONLY_CATEGORIES and not cn_hk_mo_origin:
+            analysis = _not_from_cn_hk_mo_result(origin, need_reasoning)
 
         else:
-            # Unknown category - apply as-is
-            analysis = {
-                'excluded': False,
-                'exemption_code': None,
-                'reasoning': f'APPLIES: {tariff["name"]} (category: {category})',
-                'final_amount': tariff['amount']
-            }
+            # Unknown categories fall back to applying the tariff as-is
+            handler = APPLY_DISPATCH.get(category, _apply_unknown_category_logic)
+            analysis = handler(tariff, answers, product_info, need_reasoning)
+            # If automotive/buses tariff applies (not excluded), mark HTS-based 232 as active
+            if category in HTS_232 and not analysis['excluded']:
+                hts_based_232_applies = True
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("  → %s Section 232 applies - material-based 232 tariffs will be excluded",
+                                category.removeprefix('section_232_').capitalize())
 
-        # Combine tariff info with analysis
-        result = {
-            **tariff,  # code, name, rate, amount, category, description
-            **analysis  # excluded, exemption_code, reasoning, final_amount
-        }
+        # Combine tariff info with analysis (copy first - the caller's tariff dicts are left untouched)
+        result = tariff.copy()  # code, name, rate, amount, category, description
+        result.update(analysis)  # excluded, exemption_code, reasoning, final_amount
 
         results.append(result)
 
-        logger.info(f"  Result: {analysis['reasoning']}")
+        logger.info("  Result: %s", analysis['reasoning'])
 
     return results